@@ -1,7 +1,4 @@
-import io
 import os
-import zipfile
-import hashlib
 import importlib
 import sys
 
@@ -42,7 +39,7 @@ def _try_import():
         try:
             mod = importlib.import_module(name)
             # Validate expected attributes
-            for attr in ("extract_image_urls", "fetch_html", "robots_allows", "DEFAULT_HEADERS"):
+            for attr in ("extract_image_urls", "fetch_html", "download_images", "robots_allows", "zip_folder", "clear_folder", "DEFAULT_HEADERS"):
                 getattr(mod, attr)
             return mod
         except Exception as e:
@@ -53,15 +50,11 @@ try:
     scraper = _try_import()
     extract_image_urls = scraper.extract_image_urls
     fetch_html = scraper.fetch_html
+    download_images = scraper.download_images
     robots_allows = scraper.robots_allows
+    zip_folder = scraper.zip_folder
+    clear_folder = scraper.clear_folder
     DEFAULT_HEADERS = scraper.DEFAULT_HEADERS
-    # Optional helpers if present
-    content_type_is_image = getattr(scraper, "content_type_is_image", None)
-    infer_extension = getattr(scraper, "infer_extension", None)
-    PIL_AVAILABLE = getattr(scraper, "PIL_AVAILABLE", False)
-    Image = getattr(scraper, "Image", None)
-    BytesIO = getattr(scraper, "BytesIO", None)
-    same_domain_func = getattr(scraper, "same_domain", None)
 except Exception as e:
     st.error(f"Erreur d'import du module scraper : {e}")
     st.info("Assurez-vous que **image_scraper.py** (ou **scraper_utils.py**) est présent **au même niveau** que app.py, "
@@ -91,23 +84,19 @@ progress = st.progress(0, text="En attente...")
 def write_log(msg):
     log.text(msg)
 
-def zip_folder(folder_path, zip_name="images.zip"):
-    memzip = io.BytesIO()
-    with zipfile.ZipFile(memzip, "w", zipfile.ZIP_DEFLATED) as zf:
-        for root, _, files in os.walk(folder_path):
-            for f in files:
-                fp = os.path.join(root, f)
-                arc = os.path.relpath(fp, folder_path)
-                zf.write(fp, arcname=arc)
-    memzip.seek(0)
-    return memzip
+# Cached per URL/page so sidebar changes and button reruns skip the fetch + parse
+@st.cache_data(show_spinner=False, ttl=3600)
+def cached_fetch_html(url, timeout):
+    return fetch_html(url, timeout=timeout)
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def cached_extract_image_urls(html, base_url, only_same_domain):
+    return extract_image_urls(html, base_url=base_url, only_same_domain=only_same_domain)
 
 if clear and out_dir:
     try:
         if os.path.isdir(out_dir):
-            for root, _, files in os.walk(out_dir, topdown=False):
-                for f in files:
-                    os.remove(os.path.join(root, f))
+            clear_folder(out_dir)
             write_log(f"Dossier vidé : {out_dir}")
         else:
             write_log("Aucun dossier à vider.")
@@ -127,10 +116,10 @@ if start:
                 st.stop()
 
         write_log("Récupération de la page...")
-        html = fetch_html(url, timeout=int(timeout))
+        html = cached_fetch_html(url, int(timeout))
 
         write_log("Extraction des URLs d'images...")
-        img_urls = extract_image_urls(html, base_url=url)
+        img_urls = cached_extract_image_urls(html, url, same_domain)
         total = len(img_urls)
         if total == 0:
             st.warning("Aucune image candidate trouvée sur cette page.")
@@ -138,61 +127,49 @@ if start:
 
         st.info(f"{total} image(s) candidate(s) trouvée(s). Téléchargement en cours...")
 
-        # Download loop (inline to show progress)
-        import requests
         os.makedirs(out_dir, exist_ok=True)
-        session = requests.Session()
-        session.headers.update(DEFAULT_HEADERS)
-
-        saved = 0
-        for i, img_url in enumerate(img_urls, start=1):
-            if saved >= max_images:
-                break
-            if same_domain and same_domain_func and not same_domain_func(url, img_url):
-                progress.progress(min(i/total, 1.0), text=f"Filtré (hors domaine) {i}/{total}")
-                continue
-            try:
-                resp = session.get(img_url, stream=True, timeout=int(timeout))
-                if resp.status_code >= 400:
-                    progress.progress(min(i/total, 1.0), text=f"HTTP {resp.status_code} : {i}/{total}")
-                    continue
-
-                content = resp.content
-
-                # Determine extension
-                if infer_extension:
-                    ext = infer_extension(resp, img_url)
-                else:
-                    ext = ".jpg"
-
-                # Optional Pillow dimension filter
-                if PIL_AVAILABLE and (min_w or min_h) and Image is not None:
-                    try:
-                        from io import BytesIO as _BytesIO
-                        im = Image.open(_BytesIO(content))
-                        w, h = im.size
-                        if (min_w and w < min_w) or (min_h and h < min_h):
-                            progress.progress(min(i/total, 1.0), text=f"Petite image {w}x{h} — {i}/{total}")
-                            continue
-                    except Exception:
-                        pass
-
-                # Name and save
-                h = hashlib.sha1(img_url.encode("utf-8")).hexdigest()[:12]
-                filename = f"{saved+1:04d}_{h}{ext}"
-                with open(os.path.join(out_dir, filename), "wb") as f:
-                    f.write(content)
-
-                saved += 1
-                progress.progress(min(i/total, 1.0), text=f"Téléchargée {saved}/{max_images} (candidat {i}/{total})")
-            except Exception as e:
-                progress.progress(min(i/total, 1.0), text=f"Erreur: {e} — {i}/{total}")
-                continue
+
+        # Each progress update is a websocket round-trip: cap at ~50 updates,
+        # plus one per saved image so the counter keeps moving
+        step = max(1, total // 50)
+
+        def report_progress(i, saved, status, img_url, detail):
+            if status != "saved" and i % step != 0 and i != total:
+                return
+            frac = min(i/total, 1.0)
+            if status == "saved":
+                text = f"Téléchargée {saved}/{max_images} (candidat {i}/{total})"
+            elif status == "http":
+                text = f"HTTP {detail} : {i}/{total}"
+            elif status == "small":
+                text = f"Petite image {detail[0]}x{detail[1]} — {i}/{total}"
+            elif status == "skip":
+                text = f"Pas une image — {i}/{total}"
+            else:
+                text = f"Erreur: {detail} — {i}/{total}"
+            progress.progress(frac, text=text)
+
+        # Concurrent downloads; progress is reported as each image completes
+        saved = download_images(
+            img_urls,
+            out_dir=out_dir,
+            max_images=int(max_images),
+            delay=delay,
+            timeout=int(timeout),
+            min_w=min_w,
+            min_h=min_h,
+            on_result=report_progress,
+        )
 
         write_log(f"Terminé. {saved} image(s) sauvegardée(s) dans '{out_dir}'.")
         if saved > 0:
-            memzip = zip_folder(out_dir, "images.zip")
-            st.download_button("⬇️ Télécharger le ZIP", memzip, file_name="images.zip", mime="application/zip", use_container_width=True)
+            zip_path = zip_folder(out_dir, "images.zip")
+            try:
+                # download_button reads the file right away, so it can go afterwards
+                with open(zip_path, "rb") as f:
+                    st.download_button("⬇️ Télécharger le ZIP", f, file_name="images.zip", mime="application/zip", use_container_width=True)
+            finally:
+                os.unlink(zip_path)
         else:
             st.warning("Aucune image sauvegardée.")
 
@@ -8,42 +8,93 @@ Usage examples:
   python image_scraper.py --url "https://example.com" --no-robots
 
 Requires:
-  pip install requests beautifulsoup4 pillow
+  pip install requests aiohttp beautifulsoup4 pillow
+  pip install selectolax   # optional, much faster HTML parsing
+  pip install deflate      # optional, libdeflate-backed ZIP compression
+  pip install xxhash       # optional, faster file-name hashing
 
 Notes:
 - By default, obeys robots.txt. Use --no-robots to skip (not recommended).
 - Extracts images from <img src>, srcset, data-src, and meta og:image / twitter:image.
 - Resolves relative URLs, deduplicates, and rate-limits requests.
+- Downloads run concurrently (bounded number of in-flight requests); --delay
+  still spaces out request starts across all of them.
 """
 
 import argparse
+import asyncio
+import atexit
 import hashlib
+import importlib.util
 import os
 import re
-import time
-import mimetypes
+import shutil
+import sys
+import threading
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional
 from urllib.parse import urljoin, urlparse
 
-import requests
-from bs4 import BeautifulSoup
+# requests, aiohttp, bs4 and PIL are imported inside the functions that use
+# them: importing this module (e.g. just for robots_allows) stays cheap.
 
 try:
     from urllib import robotparser
 except Exception:
     robotparser = None
 
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except Exception:
+    SELECTOLAX_AVAILABLE = False
+
 try:
-    from PIL import Image
-    from io import BytesIO
-    PIL_AVAILABLE = True
+    import deflate
+    DEFLATE_AVAILABLE = True
 except Exception:
-    PIL_AVAILABLE = False
+    DEFLATE_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except Exception:
+    XXHASH_AVAILABLE = False
 
 
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; ImageScraper/1.0; +https://example.com/bot)"
 }
 
+# Concurrency limits for image downloads
+MAX_IN_FLIGHT = 16
+MAX_PER_HOST = 8
+
+# Image bodies are streamed in chunks and kept in memory up to SPOOL_MAX_SIZE
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 256 * 1024
+
+
+@lru_cache(maxsize=None)
+def _get_session():
+    # Shared, pooled session for page fetches (keeps connections alive across calls)
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.headers["Connection"] = "keep-alive"
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.2))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 def parse_args():
     p = argparse.ArgumentParser(description="Scrape and download images from a single URL.")
@@ -59,178 +110,518 @@ def parse_args():
     return p.parse_args()
 
 
-def robots_allows(url: str, user_agent: str) -> bool:
-    if robotparser is None:
+class _PermissiveRobots:
+    """Stand-in parser used when robots.txt cannot be fetched or parsed."""
+
+    def can_fetch(self, user_agent, url):
         return True
+
+
+_PERMISSIVE = _PermissiveRobots()
+
+
+@lru_cache(maxsize=64)
+def _get_robot_parser(scheme: str, netloc: str):
+    # Cached per host, failures included, so robots.txt is fetched once
     try:
-        parsed = urlparse(url)
-        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
         rp = robotparser.RobotFileParser()
-        rp.set_url(robots_url)
+        rp.set_url(f"{scheme}://{netloc}/robots.txt")
         rp.read()
-        return rp.can_fetch(user_agent, url)
+        return rp
     except Exception:
         # If robots.txt cannot be fetched or parsed, be permissive
+        return _PERMISSIVE
+
+
+def robots_allows(url: str, user_agent: str) -> bool:
+    if robotparser is None:
+        return True
+    try:
+        parsed = urlparse(url)
+        return _get_robot_parser(parsed.scheme, parsed.netloc).can_fetch(user_agent, url)
+    except Exception:
+        # Malformed URL or parser error: be permissive, as before
         return True
 
 
 def fetch_html(url: str, timeout: int) -> str:
-    r = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout)
+    r = _get_session().get(url, timeout=timeout)
     r.raise_for_status()
     return r.text
 
 
-def extract_image_urls(html: str, base_url: str) -> list[str]:
+# CSS url(...) references, e.g. background-image: url('x.jpg'); only run on
+# style attributes and <style> text, never on raw HTML
+_STYLE_URL_RE = re.compile(r'url\(\s*([^)]+?)\s*\)', re.IGNORECASE)
+# Font sources are not images
+_FONT_FACE_RE = re.compile(r'@font-face\s*\{[^}]*\}', re.IGNORECASE)
+
+# srcset candidates (HTML spec): the URL is the whole non-whitespace run, so
+# commas inside it belong to it; only leading/trailing commas separate
+_SRCSET_URL_RE = re.compile(r'[\s,]*(\S+)')
+_SRCSET_DESCRIPTOR_RE = re.compile(r'[^,]*')
+
+IMG_ATTRS = ("src", "data-src", "data-original", "data-lazy", "data-srcset", "data-original-src")
+META_IMAGE_PROPS = ("og:image", "twitter:image", "twitter:image:src")
+
+
+def _parse_image_tags(html: str):
+    """Return (attribute dicts of every <img>, og/twitter image contents, CSS texts).
+
+    CSS texts are style="..." attribute values and <style> element contents,
+    with entities already decoded by the parser.
+    """
+    if SELECTOLAX_AVAILABLE:
+        tree = HTMLParser(html)
+        imgs = [img.attributes for img in tree.css("img")]
+        metas = []
+        for prop in META_IMAGE_PROPS:
+            tag = tree.css_first(f'meta[property="{prop}"]') or tree.css_first(f'meta[name="{prop}"]')
+            if tag is not None and tag.attributes.get("content"):
+                metas.append(tag.attributes["content"])
+        styles = [node.attributes.get("style") or "" for node in tree.css("[style]")]
+        styles += [node.text() for node in tree.css("style")]
+        return imgs, metas, styles
+
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "html.parser")
-    urls = set()
+    imgs = [img.attrs for img in soup.find_all("img")]
+    metas = []
+    for prop in META_IMAGE_PROPS:
+        tag = soup.find("meta", attrs={"property": prop}) or soup.find("meta", attrs={"name": prop})
+        if tag and tag.get("content"):
+            metas.append(tag["content"])
+    styles = [tag["style"] for tag in soup.find_all(style=True)]
+    styles += [tag.get_text() for tag in soup.find_all("style")]
+    return imgs, metas, styles
+
+
+def _parse_srcset(srcset: str) -> list[tuple[str, str]]:
+    """Split a srcset value into (url, descriptor) pairs."""
+    candidates = []
+    pos = 0
+    while True:
+        m = _SRCSET_URL_RE.match(srcset, pos)
+        if m is None:
+            return candidates
+        url, pos = m.group(1), m.end()
+        descriptor = ""
+        if url.endswith(","):
+            # Trailing commas end the candidate; there is no descriptor
+            url = url.rstrip(",")
+        else:
+            d = _SRCSET_DESCRIPTOR_RE.match(srcset, pos)
+            descriptor, pos = d.group(0).strip(), d.end()
+        if url:
+            candidates.append((url, descriptor))
+
+
+def _width_hint(descriptor: str) -> Optional[int]:
+    # srcset "1200w" width descriptor -> 1200
+    descriptor = descriptor.strip()
+    if descriptor.endswith("w") and descriptor[:-1].isdigit():
+        return int(descriptor[:-1])
+    return None
+
+
+def extract_image_urls(html: str, base_url: str, only_same_domain: bool = False) -> list[tuple[str, Optional[int]]]:
+    """Return (url, width_hint) pairs; width_hint comes from srcset "<n>w" descriptors.
+
+    URLs are resolved, deduplicated in page order and, with only_same_domain,
+    restricted to the page's domain, all in one pass.
+    """
+    imgs, metas, styles = _parse_image_tags(html)
+    base_netloc = urlparse(base_url).netloc if only_same_domain else ""
+    # url -> width hint; dict keys give ordered dedupe in a single pass
+    urls = {}
+
+    def add(raw, hint=None):
+        full = urljoin(base_url, raw)
+        if full in urls:
+            if hint is not None:
+                urls[full] = hint
+            return
+        if only_same_domain and not _same_netloc(base_netloc, full):
+            return
+        urls[full] = hint
 
     # <img src> and common lazy-loading attributes
-    for img in soup.find_all("img"):
-        candidates = []
-        for attr in ("src", "data-src", "data-original", "data-lazy", "data-srcset", "data-original-src"):
-            val = img.get(attr)
+    for attrs in imgs:
+        for attr in IMG_ATTRS:
+            val = attrs.get(attr)
             if val:
-                candidates.append(val)
+                add(val)
 
         # srcset parsing
-        srcset = img.get("srcset") or img.get("data-srcset")
+        srcset = attrs.get("srcset") or attrs.get("data-srcset")
         if srcset:
-            for part in srcset.split(","):
-                url_part = part.strip().split(" ")[0].strip()
-                if url_part:
-                    candidates.append(url_part)
-
-        for c in candidates:
-            full = urljoin(base_url, c)
-            urls.add(full)
+            for url_part, descriptor in _parse_srcset(srcset):
+                if not url_part.startswith("data:"):
+                    add(url_part, _width_hint(descriptor))
 
     # Open Graph / Twitter cards
-    for prop in ("og:image", "twitter:image", "twitter:image:src"):
-        tag = soup.find("meta", attrs={"property": prop}) or soup.find("meta", attrs={"name": prop})
-        if tag and tag.get("content"):
-            urls.add(urljoin(base_url, tag["content"].strip()))
+    for content in metas:
+        add(content.strip())
 
-    # Basic CSS background-image: url(...) inline styles
+    # Basic CSS background-image: url(...) in style attributes and <style>
     # (This is heuristic and won't catch external CSS files.)
-    style_urls = set(re.findall(r'url\\(([^)]+)\\)', html, flags=re.IGNORECASE))
-    for su in style_urls:
-        su = su.strip('\'"')
-        if su and not su.lower().startswith("data:"):
-            urls.add(urljoin(base_url, su))
-
-    # Filter obvious non-image extensions
-    allowed_exts = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".svg", ".tiff", ".tif", ".avif"}
-    filtered = []
-    for u in urls:
-        path = urlparse(u).path
-        ext = os.path.splitext(path)[1].lower()
-        if ext and ext in allowed_exts:
-            filtered.append(u)
-        else:
-            # Keep if content-type can later confirm image
-            filtered.append(u)
+    for css in styles:
+        for su in _STYLE_URL_RE.findall(_FONT_FACE_RE.sub("", css)):
+            su = su.strip("\"'")
+            # Skip inline data and same-document references like url(#grad)
+            if su and not su.lower().startswith("data:") and not su.startswith("#"):
+                add(su)
 
-    return list(dict.fromkeys(filtered))  # preserve order, dedupe
+    return list(urls.items())
 
 
-def content_type_is_image(resp: requests.Response) -> bool:
+def content_type_is_image(resp) -> bool:
     ctype = resp.headers.get("Content-Type", "").lower()
     return ctype.startswith("image/")
 
 
-def infer_extension(resp: requests.Response, url: str) -> str:
+# Image MIME types -> file extension (avoids loading the system MIME database)
+_CTYPE_TO_EXT = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/avif": ".avif",
+    "image/svg+xml": ".svg",
+    "image/bmp": ".bmp",
+    "image/tiff": ".tiff",
+    "image/heic": ".heic",
+    "image/x-icon": ".ico",
+}
+
+
+def infer_extension(resp, url: str) -> str:
     # Prefer URL extension
     ext = os.path.splitext(urlparse(url).path)[1].lower()
     if ext:
         return ext
 
-    # Fall back to MIME type
-    ctype = resp.headers.get("Content-Type", "").lower()
-    if ctype:
-        ext = mimetypes.guess_extension(ctype.split(";")[0].strip())
-        if ext:
-            return ext
+    # Fall back to MIME type, then default
+    ctype = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    return _CTYPE_TO_EXT.get(ctype, ".jpg")
+
 
-    # Default
-    return ".jpg"
+def _same_netloc(base_netloc: str, target_url: str) -> bool:
+    t = urlparse(target_url).netloc
+    return base_netloc == t or t.endswith("." + base_netloc)
 
 
 def same_domain(base_url: str, target_url: str) -> bool:
-    b = urlparse(base_url).netloc
-    t = urlparse(target_url).netloc
-    return b == t or t.endswith("." + b)
+    return _same_netloc(urlparse(base_url).netloc, target_url)
 
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
 
+def url_tag(url: str) -> str:
+    """Short non-cryptographic 48-bit tag of a URL, used in file names."""
+    data = url.encode("utf-8")
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_hexdigest(data)[:12]
+    return hashlib.blake2s(data, digest_size=6).hexdigest()
+
+
 def hash_to_name(url: str, idx: int, ext: str) -> str:
-    h = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
-    return f"{idx:04d}_{h}{ext}"
+    return f"{idx:04d}_{url_tag(url)}{ext}"
 
 
-def download_images(img_urls, base_url, out_dir, max_images, delay, timeout, only_same_domain, min_w, min_h):
-    ensure_dir(out_dir)
-    count = 0
-    session = requests.Session()
-    session.headers.update(DEFAULT_HEADERS)
+async def _download_one(session, img_url, wait_turn, min_w, min_h):
+    """Fetch one image. Returns (status, detail); status "ok" carries (body, ext).
 
-    for i, img_url in enumerate(img_urls, start=1):
-        if count >= max_images:
-            break
+    The body is streamed into a SpooledTemporaryFile (small images stay in
+    memory, large ones spill to disk); the caller owns and must close it.
+    """
+    body = None
+    try:
+        await wait_turn()
+        async with session.get(img_url) as resp:
+            if resp.status >= 400:
+                return "http", resp.status
+
+            if not content_type_is_image(resp) and not PIL_AVAILABLE:
+                # Without Pillow we cannot confirm it is an image
+                return "skip", resp.headers.get("Content-Type", "")
+
+            body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                body.write(chunk)
+            ext = infer_extension(resp, img_url)
 
-        if only_same_domain and not same_domain(base_url, img_url):
-            continue
+        if PIL_AVAILABLE and (min_w or min_h):
+            try:
+                # Header-only read: .size never decodes pixels. The context
+                # manager drops Pillow's reference without closing body.
+                from PIL import Image
 
-        try:
-            resp = session.get(img_url, stream=True, timeout=timeout)
-            if resp.status_code >= 400:
-                continue
-
-            if not content_type_is_image(resp):
-                # Some CDNs need a second try without stream to get headers right
-                # Or the URL might be missing an extension but still serve an image.
-                # We'll try to read a small piece and check with Pillow if available.
-                if not PIL_AVAILABLE:
-                    continue
+                body.seek(0)
+                with Image.open(body) as im:
+                    w, h = im.size
+                if (min_w and w < min_w) or (min_h and h < min_h):
+                    body.close()
+                    return "small", (w, h)
+            except Exception:
+                # If cannot open with Pillow, skip size filter
+                pass
+
+        body.seek(0)
+        return "ok", (body, ext)
+    except Exception as e:
+        if body is not None:
+            body.close()
+        return "error", e
 
-            # Optional Pillow size check (requires loading content in memory)
-            content = resp.content
-            ext = infer_extension(resp, img_url)
 
-            if PIL_AVAILABLE and (min_w or min_h):
+# Write-once payloads: skip atime updates where the platform allows it
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+if sys.platform == "linux" and hasattr(os, "O_NOATIME"):
+    _WRITE_FLAGS |= os.O_NOATIME
+
+
+def _open_for_write(filepath):
+    try:
+        fd = os.open(filepath, _WRITE_FLAGS, 0o644)
+    except PermissionError:
+        # O_NOATIME is refused on files we do not own
+        fd = os.open(filepath, _WRITE_FLAGS & ~getattr(os, "O_NOATIME", 0), 0o644)
+    return os.fdopen(fd, "wb")
+
+
+def _save_image(out_dir, img_url, idx, body, ext):
+    filename = hash_to_name(img_url, idx, ext)
+    filepath = os.path.join(out_dir, filename)
+    with body, _open_for_write(filepath) as f:
+        shutil.copyfileobj(body, f, CHUNK_SIZE)
+    return filepath
+
+
+async def _download_all(img_urls, out_dir, max_images, delay, timeout, min_w, min_h, on_result):
+    import aiohttp
+
+    count = 0
+    done = 0
+    # Bounded hand-off: the producer stops feeding URLs once max_images is reached
+    # Never run more workers than images wanted, so no extra bodies are fetched
+    n_workers = max(1, min(MAX_IN_FLIGHT, max_images))
+    queue = asyncio.Queue(maxsize=n_workers * 2)
+    connector = aiohttp.TCPConnector(limit=MAX_IN_FLIGHT, limit_per_host=MAX_PER_HOST)
+    # Connect/read inactivity limits, like requests: no overall deadline, so
+    # large images on slow links and waits for a connector slot are fine
+    client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+
+    # Rate limit shared by all workers: request starts are `delay` apart
+    pace_lock = asyncio.Lock()
+    next_start = 0.0
+
+    async def wait_turn():
+        nonlocal next_start
+        async with pace_lock:
+            now = asyncio.get_running_loop().time()
+            if next_start > now:
+                await asyncio.sleep(next_start - now)
+                now = next_start
+            next_start = now + delay
+
+    # aiohttp keeps connections alive and reuses them from the connector pool
+    async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=connector, timeout=client_timeout) as session:
+        async def producer():
+            nonlocal done
+            for img_url, width_hint in img_urls:
+                if count >= max_images:
+                    break
+                if width_hint and min_w and width_hint < min_w:
+                    # srcset already tells us it is too narrow: skip the request
+                    done += 1
+                    on_result(done, count, "small", img_url, (width_hint, "?"))
+                    continue
+                await queue.put(img_url)
+            for _ in range(n_workers):
+                await queue.put(None)
+
+        # A worker only takes a URL while saved + in-flight downloads is below
+        # max_images; it waits (rather than over-fetching) until one finishes
+        slots = asyncio.Condition()
+        pending = 0
+
+        def has_slot():
+            return count >= max_images or count + pending < max_images
+
+        async def worker():
+            # count is only touched between awaits, so no lock is needed
+            nonlocal count, done, pending
+            while True:
+                async with slots:
+                    await slots.wait_for(has_slot)
+                    if count >= max_images:
+                        return
+                    pending += 1
                 try:
-                    im = Image.open(BytesIO(content))
-                    w, h = im.size
-                    if (min_w and w < min_w) or (min_h and h < min_h):
-                        time.sleep(delay)
-                        continue
-                except Exception:
-                    # If cannot open with Pillow, skip size filter
-                    pass
-
-            filename = hash_to_name(img_url, count + 1, ext)
-            filepath = os.path.join(out_dir, filename)
-            with open(filepath, "wb") as f:
-                f.write(content)
-
-            count += 1
-            print(f"[{count}] Saved {img_url} -> {filepath}")
-            time.sleep(delay)
-
-        except KeyboardInterrupt:
-            print("Interrupted by user.")
-            break
-        except Exception as e:
-            # Skip on error
-            print(f"Skip {img_url} ({e})")
-            time.sleep(delay)
-            continue
+                    img_url = await queue.get()
+                    if img_url is None:
+                        return
+                    status, detail = await _download_one(session, img_url, wait_turn, min_w, min_h)
+
+                    if status == "ok":
+                        if count >= max_images:
+                            detail[0].close()
+                            return
+                        try:
+                            detail = _save_image(out_dir, img_url, count + 1, *detail)
+                        except OSError as e:
+                            status, detail = "error", e
+                        else:
+                            count += 1
+                            status = "saved"
+
+                    done += 1
+                    on_result(done, count, status, img_url, detail)
+                finally:
+                    async with slots:
+                        pending -= 1
+                        slots.notify_all()
+
+        feeder = asyncio.create_task(producer())
+        try:
+            await asyncio.gather(*(worker() for _ in range(n_workers)))
+        finally:
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions=True)
 
     return count
 
 
+def _print_result(done, count, status, img_url, detail):
+    if status == "saved":
+        print(f"[{count}] Saved {img_url} -> {detail}")
+    elif status == "error":
+        print(f"Skip {img_url} ({detail})")
+
+
+def download_images(img_urls, out_dir, max_images, delay, timeout, min_w, min_h, on_result=None):
+    """Download images concurrently; returns the number of saved files.
+
+    img_urls holds (url, width_hint) pairs as returned by extract_image_urls.
+
+    on_result(done, saved, status, img_url, detail) is called once per candidate
+    as it completes, with status one of "saved", "http", "skip", "small" or
+    "error".
+    """
+    ensure_dir(out_dir)
+    report = on_result or _print_result
+    saved = 0
+
+    def track(done, count, status, img_url, detail):
+        nonlocal saved
+        saved = count
+        report(done, count, status, img_url, detail)
+
+    try:
+        asyncio.run(_download_all(
+            img_urls, out_dir, max_images, delay, timeout, min_w, min_h, track
+        ))
+    except KeyboardInterrupt:
+        print("Interrupted by user.")
+
+    return saved
+
+
+class _LibdeflateCompressor:
+    """zipfile compressor object backed by libdeflate (one-shot per member)."""
+
+    def __init__(self, level):
+        self._level = 6 if level is None else level
+        self._buf = bytearray()
+
+    def compress(self, data):
+        self._buf += data
+        return b""
+
+    def flush(self):
+        return deflate.deflate_compress(bytes(self._buf), self._level)
+
+
+_LIBDEFLATE_LOCK = threading.Lock()
+
+
+@contextmanager
+def _libdeflate_zip():
+    # Route zipfile's ZIP_DEFLATED members through libdeflate, only while
+    # zip_folder writes; the stdlib compressor is restored afterwards.
+    if not DEFLATE_AVAILABLE or not hasattr(zipfile, "_get_compressor"):
+        yield
+        return
+
+    with _LIBDEFLATE_LOCK:
+        zip_get_compressor = zipfile._get_compressor
+
+        def _get_compressor(compress_type, compresslevel=None):
+            if compress_type == zipfile.ZIP_DEFLATED:
+                return _LibdeflateCompressor(compresslevel)
+            return zip_get_compressor(compress_type, compresslevel)
+
+        zipfile._get_compressor = _get_compressor
+        try:
+            yield
+        finally:
+            zipfile._get_compressor = zip_get_compressor
+
+
+def _iter_files(folder_path):
+    # Recursive scandir: file type comes from readdir, no per-file stat/join
+    with os.scandir(folder_path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
+# Formats that are already compressed: deflating them again wastes CPU
+_COMPRESSED_EXTS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif", ".heic", ".heif"})
+
+
+_TEMP_ZIPS = []
+
+
+@atexit.register
+def _remove_temp_zips():
+    for path in _TEMP_ZIPS:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def zip_folder(folder_path, zip_name="images.zip") -> str:
+    """Zip folder_path into a temporary file on disk and return its path.
+
+    The caller deletes the file once served; leftovers are removed at exit.
+    """
+    tmp = tempfile.NamedTemporaryFile(prefix=os.path.splitext(zip_name)[0] + "_", suffix=".zip", delete=False)
+    # Only track archives callers have not deleted yet
+    _TEMP_ZIPS[:] = [path for path in _TEMP_ZIPS if os.path.exists(path)]
+    _TEMP_ZIPS.append(tmp.name)
+    with tmp, _libdeflate_zip(), zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+        for entry in _iter_files(folder_path):
+            arc = os.path.relpath(entry.path, folder_path)
+            ext = os.path.splitext(entry.name)[1].lower()
+            method = zipfile.ZIP_STORED if ext in _COMPRESSED_EXTS else zipfile.ZIP_DEFLATED
+            zf.write(entry.path, arcname=arc, compress_type=method, compresslevel=1)
+    return tmp.name
+
+
+def clear_folder(folder_path):
+    """Delete every file under folder_path (sub-folders are kept)."""
+    for entry in _iter_files(folder_path):
+        os.unlink(entry.path)
+
+
 def main():
     args = parse_args()
 
@@ -245,17 +636,15 @@ def main():
         print(f"Failed to fetch page: {e}")
         return
 
-    img_urls = extract_image_urls(html, base_url=args.url)
+    img_urls = extract_image_urls(html, base_url=args.url, only_same_domain=args.same_domain)
     print(f"Found {len(img_urls)} candidate image URLs. Starting downloads...")
 
     saved = download_images(
         img_urls,
-        base_url=args.url,
         out_dir=args.out,
         max_images=args.max,
         delay=args.delay,
         timeout=args.timeout,
-        only_same_domain=args.same_domain,
         min_w=args.min_width,
         min_h=args.min_height,
     )
@@ -0,0 +1,14 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+_PATH = Path(__file__).resolve().parent.parent / "image_scraper (2).py"
+
+
+@pytest.fixture(scope="session")
+def image_scraper():
+    spec = importlib.util.spec_from_file_location("image_scraper", _PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
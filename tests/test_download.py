@@ -0,0 +1,98 @@
+import asyncio
+import sys
+import threading
+import types
+
+import pytest
+
+
+class _FakeResponse:
+    def __init__(self, url):
+        self.status = 404 if "missing" in url else 200
+        self.headers = {"Content-Type": "image/png"}
+        self.content = self
+
+    async def iter_chunked(self, size):
+        await asyncio.sleep(0.01)
+        yield b"png"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    requests = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, url):
+        self.requests.append(url)
+        if "broken" in url:
+            raise OSError("connection reset")
+        return _FakeResponse(url)
+
+
+@pytest.fixture
+def fake_aiohttp(monkeypatch, image_scraper):
+    module = types.ModuleType("aiohttp")
+    module.ClientSession = _FakeSession
+    module.TCPConnector = lambda **kwargs: None
+    module.ClientTimeout = lambda **kwargs: None
+    monkeypatch.setitem(sys.modules, "aiohttp", module)
+    monkeypatch.setattr(image_scraper, "PIL_AVAILABLE", False)
+    _FakeSession.requests = []
+    return _FakeSession.requests
+
+
+def _download(image_scraper, tmp_path, urls, max_images):
+    """Run download_images in a thread so a deadlock fails instead of hanging."""
+    result = {}
+
+    def run():
+        result["saved"] = image_scraper.download_images(
+            [(u, None) for u in urls], str(tmp_path), max_images,
+            delay=0, timeout=5, min_w=0, min_h=0, on_result=lambda *a: None,
+        )
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    t.join(timeout=10)
+    assert not t.is_alive(), "download_images did not finish"
+    return result["saved"]
+
+
+def test_requests_stop_at_max_images(image_scraper, fake_aiohttp, tmp_path):
+    urls = [f"https://ex.com/{i}.png" for i in range(40)]
+    assert _download(image_scraper, tmp_path, urls, 7) == 7
+    assert len(fake_aiohttp) == 7
+    assert len(list(tmp_path.iterdir())) == 7
+
+
+def test_failed_candidates_free_their_slot(image_scraper, fake_aiohttp, tmp_path):
+    urls = ["https://ex.com/missing.png", "https://ex.com/broken.png"]
+    urls += [f"https://ex.com/{i}.png" for i in range(10)]
+    assert _download(image_scraper, tmp_path, urls, 3) == 3
+    assert "https://ex.com/missing.png" in fake_aiohttp
+    assert "https://ex.com/broken.png" in fake_aiohttp
+    assert len(fake_aiohttp) == 5
+
+
+def test_empty_candidate_list(image_scraper, fake_aiohttp, tmp_path):
+    assert _download(image_scraper, tmp_path, [], 5) == 0
+    assert fake_aiohttp == []
+
+
+def test_max_images_above_candidate_count(image_scraper, fake_aiohttp, tmp_path):
+    urls = [f"https://ex.com/{i}.png" for i in range(3)] + ["https://ex.com/missing.png"]
+    assert _download(image_scraper, tmp_path, urls, 50) == 3
+    assert len(fake_aiohttp) == 4
@@ -0,0 +1,79 @@
+import pytest
+
+
+@pytest.fixture(params=["selectolax", "bs4"], autouse=True)
+def parser_backend(request, monkeypatch, image_scraper):
+    if request.param == "selectolax":
+        if not image_scraper.SELECTOLAX_AVAILABLE:
+            pytest.skip("selectolax not installed")
+    else:
+        pytest.importorskip("bs4")
+        monkeypatch.setattr(image_scraper, "SELECTOLAX_AVAILABLE", False)
+    return request.param
+
+
+@pytest.fixture
+def extract_urls(image_scraper):
+    def urls(html, base_url="https://ex.com/p/"):
+        return [u for u, _ in image_scraper.extract_image_urls(html, base_url)]
+    return urls
+
+
+def test_inline_style_url_with_quotes(extract_urls):
+    html = "<div style=\"background-image:url('x.jpg')\"></div>"
+    assert extract_urls(html) == ["https://ex.com/p/x.jpg"]
+
+
+def test_inline_style_url_with_entity_encoded_quotes(extract_urls):
+    html = '<div style="background:url(&quot;q.jpg&quot;)"></div>'
+    assert extract_urls(html) == ["https://ex.com/p/q.jpg"]
+
+
+def test_style_element_url(extract_urls):
+    html = "<style>.hero{background:url(/hero.png)}</style>"
+    assert extract_urls(html) == ["https://ex.com/hero.png"]
+
+
+def test_svg_fragment_reference_is_ignored(extract_urls):
+    html = '<svg><rect fill="url(#grad)" style="fill:url(#grad2)"/></svg>'
+    assert extract_urls(html) == []
+
+
+def test_script_url_calls_are_ignored(extract_urls):
+    html = "<script>new URL(path, location.origin)</script>"
+    assert extract_urls(html) == []
+
+
+def test_font_face_sources_are_ignored(extract_urls):
+    html = "<style>@font-face{font-family:f;src:url(/f.woff2)} .a{background:url(a.jpg)}</style>"
+    assert extract_urls(html) == ["https://ex.com/p/a.jpg"]
+
+
+@pytest.fixture
+def extract_pairs(image_scraper):
+    def pairs(html, base_url="https://ex.com/p/"):
+        return image_scraper.extract_image_urls(html, base_url)
+    return pairs
+
+
+def test_srcset_url_containing_commas(extract_pairs):
+    html = '<img srcset="https://res.cloudinary.com/x/w_100,h_100/a.jpg 100w, b.jpg 200w">'
+    assert extract_pairs(html) == [
+        ("https://res.cloudinary.com/x/w_100,h_100/a.jpg", 100),
+        ("https://ex.com/p/b.jpg", 200),
+    ]
+
+
+def test_srcset_density_descriptors(extract_pairs):
+    html = '<img srcset="a.jpg 1x, b.jpg 2x">'
+    assert extract_pairs(html) == [("https://ex.com/p/a.jpg", None), ("https://ex.com/p/b.jpg", None)]
+
+
+def test_srcset_extra_whitespace_and_commas(extract_pairs):
+    html = '<img srcset="  a.jpg   ,  b.jpg   300w  , ">'
+    assert extract_pairs(html) == [("https://ex.com/p/a.jpg", None), ("https://ex.com/p/b.jpg", 300)]
+
+
+def test_srcset_data_candidates_are_skipped(extract_pairs):
+    html = '<img srcset="data:image/png;base64,AAAA 1x, c.jpg 640w, data:image/gif;base64,R0l, d.jpg">'
+    assert extract_pairs(html) == [("https://ex.com/p/c.jpg", 640), ("https://ex.com/p/d.jpg", None)]